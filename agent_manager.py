@@ -3,11 +3,13 @@ import json
 import asyncio
 import logging
 import time
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Deque
 from dataclasses import dataclass, field
+from collections import deque
 from enum import Enum
 
 import httpx
+import orjson
 
 logger = logging.getLogger("AgentManager")
 
@@ -35,7 +37,7 @@ class Message:
 class AgentContext:
     state: AgentState = AgentState.IDLE
     last_analysis: str = ""
-    spread_alerts: List[Dict] = field(default_factory=list)
+    spread_alerts: Deque[Dict] = field(default_factory=lambda: deque(maxlen=10))
     conversation_history: List[Message] = field(default_factory=list)
 
 class AgentManager:
@@ -58,6 +60,11 @@ class AgentManager:
         self._output_callbacks: List[Callable] = []
         
         self._tools = self._build_tools()
+        self._tool_handlers: Dict[str, Callable] = {
+            "get_market_data": self._tool_get_market_data,
+            "get_price_history": self._tool_get_price_history,
+            "analyze_spread": self._tool_analyze_spread,
+        }
         
     def _build_tools(self) -> List[ToolDefinition]:
         return [
@@ -167,23 +174,21 @@ Returns detailed analysis of the arbitrage potential.""",
                         
                     last_alerted[market.id] = current_time
                     
-                    direction = "lagging" if market.delta_percent > 0 else "leading"
+                    delta = market.delta_percent
+                    direction = "lagging" if delta > 0 else "leading"
                     
                     message = (
                         f"[SPREAD ALERT] {market.event_name[:40]}...\n"
-                        f"  Delta: {market.delta_percent:+.2f}% | "
-                        f"Poly {direction} by {abs(market.delta_percent):.1f}%\n"
+                        f"  Delta: {delta:+.2f}% | "
+                        f"Poly {direction} by {abs(delta):.1f}%\n"
                         f"  Kalshi: {market.kalshi_price:.2f} | Poly: {market.poly_price:.2f}"
                     )
                     
                     await self._notify_output(message, "warning")
                     
-                    context = self.context
-                    if len(context.spread_alerts) > 10:
-                        context.spread_alerts = context.spread_alerts[-10:]
-                    context.spread_alerts.append({
+                    self.context.spread_alerts.append({
                         "market_id": market.id,
-                        "delta": market.delta_percent,
+                        "delta": delta,
                         "timestamp": current_time
                     })
                     
@@ -272,7 +277,7 @@ Be concise, analytical, and focused on actionable insights."""
             if response.status_code != 200:
                 raise Exception(f"API error: {response.status_code} - {response.text}")
                 
-            data = response.json()
+            data = orjson.loads(response.content)
             choice = data["choices"][0]["message"]
             
             if choice.get("tool_calls"):
@@ -298,20 +303,15 @@ Be concise, analytical, and focused on actionable insights."""
             tool_name = tool_block.get("function", {}).get("name", "")
             tool_input = tool_block.get("function", {}).get("arguments", {})
             if isinstance(tool_input, str):
-                import json
-                tool_input = json.loads(tool_input)
+                tool_input = orjson.loads(tool_input)
         else:
             tool_name = tool_block.get("name", "")
             tool_input = tool_block.get("input", {})
         
-        if tool_name == "get_market_data":
-            return await self._tool_get_market_data(tool_input)
-        elif tool_name == "get_price_history":
-            return await self._tool_get_price_history(tool_input)
-        elif tool_name == "analyze_spread":
-            return await self._tool_analyze_spread(tool_input)
-        else:
+        handler = self._tool_handlers.get(tool_name)
+        if handler is None:
             return f"Unknown tool: {tool_name}"
+        return await handler(tool_input)
             
     async def _tool_get_market_data(self, params: Dict) -> str:
         min_spread = params.get("min_spread", 0)
@@ -329,12 +329,8 @@ Be concise, analytical, and focused on actionable insights."""
                 }, indent=2)
             return "Market not found"
             
-        markets = self.store.get_all_markets()
-        filtered = [m for m in markets if abs(m.delta_percent) >= min_spread]
-        filtered.sort(key=lambda m: abs(m.delta_percent), reverse=True)
-        
         result = []
-        for m in filtered[:limit]:
+        for m in self.store.get_markets_by_spread(min_spread=min_spread, limit=limit):
             result.append({
                 "event_name": m.event_name[:50],
                 "kalshi_price": m.kalshi_price,
@@ -350,10 +346,10 @@ Be concise, analytical, and focused on actionable insights."""
         if not market_id:
             return "market_id required"
             
-        history = self.store.get_price_history(market_id)
+        history = self.store.get_price_history(market_id, limit=20)
         
         result = []
-        for point in history[-20:]:
+        for point in history:
             result.append({
                 "timestamp": point.timestamp,
                 "kalshi_price": point.kalshi_price,
@@ -1,10 +1,12 @@
 import asyncio
 import json
 import logging
+import math
 import time
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 
+import orjson
 import websockets
 import httpx
 
@@ -12,7 +14,19 @@ from unified_store import UnifiedStore
 
 logger = logging.getLogger("LiveEngine")
 
-@dataclass
+
+def _to_float(value: Any) -> float:
+    """Coerce a numeric or numeric-string field, 0.0 when malformed or non-finite."""
+    if isinstance(value, (int, float, str)):
+        try:
+            result = float(value)
+        except (ValueError, OverflowError):
+            return 0.0
+        if math.isfinite(result):
+            return result
+    return 0.0
+
+@dataclass(slots=True)
 class ConnectionStatus:
     platform: str
     connected: bool = False
@@ -29,6 +43,19 @@ class LiveEngine:
     POLY_API = "https://clob.polymarket.com"
     POLY_GAMMA_API = "https://gamma-api.polymarket.com"
     
+    # Ticks are small JSON frames: skip permessage-deflate and allow large
+    # orderbook snapshots without tripping the default 1 MiB frame limit
+    WS_CONNECT_OPTIONS = {
+        "compression": None,
+        "max_size": 2 ** 22,
+        "max_queue": 2 ** 14,
+        "ping_interval": 20,
+        "ping_timeout": 20,
+    }
+    
+    FRAME_QUEUE_SIZE = 4096
+    FRAME_BATCH_SIZE = 64
+    
     def __init__(
         self, 
         store: UnifiedStore,
@@ -53,6 +80,11 @@ class LiveEngine:
         
         self._http_client: Optional[httpx.AsyncClient] = None
         
+        # Raw frames handed from the socket readers to the parser tasks
+        self._kalshi_queue: asyncio.Queue = asyncio.Queue(maxsize=self.FRAME_QUEUE_SIZE)
+        self._poly_queue: asyncio.Queue = asyncio.Queue(maxsize=self.FRAME_QUEUE_SIZE)
+        self._poly_questions: Dict[str, str] = {}
+        
     def add_status_callback(self, callback: Callable):
         self._status_callbacks.append(callback)
         
@@ -97,6 +129,8 @@ class LiveEngine:
         
         self._tasks.append(asyncio.create_task(self._kalshi_stream()))
         self._tasks.append(asyncio.create_task(self._poly_stream()))
+        self._tasks.append(asyncio.create_task(self._kalshi_parser()))
+        self._tasks.append(asyncio.create_task(self._poly_parser()))
         self._tasks.append(asyncio.create_task(self._status_heartbeat()))
         
         logger.info("LiveEngine started")
@@ -121,6 +155,58 @@ class LiveEngine:
             await self._notify_status(self.kalshi_status)
             await self._notify_status(self.poly_status)
             
+    def _enqueue(self, queue: asyncio.Queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop the oldest frame so the reader never blocks on the parser
+            queue.get_nowait()
+            queue.put_nowait(message)
+            
+    async def _drain(self, queue: asyncio.Queue) -> List[Any]:
+        batch = [await queue.get()]
+        while len(batch) < self.FRAME_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch
+        
+    async def _kalshi_parser(self):
+        while self._running:
+            for message in await self._drain(self._kalshi_queue):
+                try:
+                    data = orjson.loads(message)
+                except orjson.JSONDecodeError:
+                    continue
+                self.kalshi_status.messages_received += 1
+                
+                for item in (data if isinstance(data, list) else (data,)):
+                    if not isinstance(item, dict):
+                        continue
+                    try:
+                        await self._process_kalshi_message(item)
+                    except Exception:
+                        logger.exception("Failed to process Kalshi message")
+                        continue
+                    await self._notify_price("kalshi", item)
+                    
+    async def _poly_parser(self):
+        while self._running:
+            for message in await self._drain(self._poly_queue):
+                try:
+                    data = orjson.loads(message)
+                except orjson.JSONDecodeError:
+                    continue
+                self.poly_status.messages_received += 1
+                
+                for item in (data if isinstance(data, list) else (data,)):
+                    if not isinstance(item, dict):
+                        continue
+                    try:
+                        await self._process_poly_message(item)
+                    except Exception:
+                        logger.exception("Failed to process Polymarket message")
+                        continue
+                    await self._notify_price("polymarket", item)
+            
     async def _kalshi_stream(self):
         url = self.KALSHI_WSS_PROD if self.kalshi_env == "prod" else self.KALSHI_WSS_DEMO
         
@@ -132,7 +218,7 @@ class LiveEngine:
             ).decode()
             headers["Authorization"] = f"Basic {auth_value}"
         
-        kwargs = {}
+        kwargs = dict(self.WS_CONNECT_OPTIONS)
         if headers:
             kwargs["additional_headers"] = headers
             
@@ -153,24 +239,9 @@ class LiveEngine:
                         if not self._running:
                             break
                             
-                        try:
-                            # Forward raw message
-                            await self._notify_raw("kalshi", message)
-                            
-                            data = json.loads(message)
-                            self.kalshi_status.messages_received += 1
-                            
-                            if isinstance(data, list):
-                                for item in data:
-                                    await self._process_kalshi_message(item)
-                                    await self._notify_price("kalshi", item)
-                            else:
-                                await self._process_kalshi_message(data)
-                                await self._notify_price("kalshi", data)
-                            
-                        except Exception as e:
-                            # Catch all to prevent disconnect on bad message format
-                            pass
+                        # Forward raw message, parsing happens in _kalshi_parser
+                        await self._notify_raw("kalshi", message)
+                        self._enqueue(self._kalshi_queue, message)
                             
             except asyncio.CancelledError:
                 break
@@ -188,20 +259,24 @@ class LiveEngine:
         
         if msg_type == "trade" or msg_type == "orderbook":
             ticker = data.get("ticker") or data.get("market_ticker")
-            if not ticker:
+            if not ticker or not isinstance(ticker, str):
                 return
                 
             price = 0.0
             volume = 0
             
             if msg_type == "trade":
-                price = data.get("price", 0) / 100 if isinstance(data.get("price"), (int, float)) else 0
-                volume = data.get("size", 0) or data.get("volume", 0)
+                raw_price = data.get("price")
+                if isinstance(raw_price, (int, float)):
+                    price = raw_price / 100
+                volume = int(_to_float(data.get("size") or data.get("volume")))
             elif msg_type == "orderbook":
-                orderbook = data.get("orderbook", {})
-                yes_orders = orderbook.get("yes", [])
-                if yes_orders and len(yes_orders) > 0:
-                    price = yes_orders[0][0] / 100 if isinstance(yes_orders[0][0], (int, float)) else 0
+                orderbook = data.get("orderbook")
+                yes_orders = orderbook.get("yes") if isinstance(orderbook, dict) else None
+                if yes_orders and isinstance(yes_orders, list) and isinstance(yes_orders[0], (list, tuple)) and yes_orders[0]:
+                    best = yes_orders[0][0]
+                    if isinstance(best, (int, float)):
+                        price = best / 100
                     
             await self.store.update_from_kalshi(ticker, price, volume)
             
@@ -211,7 +286,7 @@ class LiveEngine:
     async def _poly_stream(self):
         while self._running:
             try:
-                async with websockets.connect(self.POLY_WSS) as ws:
+                async with websockets.connect(self.POLY_WSS, **self.WS_CONNECT_OPTIONS) as ws:
                     self.poly_status.connected = True
                     self.poly_status.last_heartbeat = time.time()
                     await self._notify_status(self.poly_status)
@@ -224,10 +299,13 @@ class LiveEngine:
                                 params={"active": "true", "limit": 100}
                             )
                             if response.status_code == 200:
-                                markets = response.json()
+                                markets = orjson.loads(response.content)
                                 for m in markets:
                                     if m.get("tokens"):
-                                        token_ids.append(m["tokens"][0].get("token_id"))
+                                        token_id = m["tokens"][0].get("token_id")
+                                        token_ids.append(token_id)
+                                        if token_id and m.get("question"):
+                                            self._poly_questions[token_id] = m["question"]
                         except Exception as e:
                             logger.error(f"Failed to fetch Poly markets: {e}")
                             
@@ -247,23 +325,9 @@ class LiveEngine:
                         if not self._running:
                             break
                             
-                        try:
-                            # Forward raw message
-                            await self._notify_raw("polymarket", message)
-                            
-                            data = json.loads(message)
-                            self.poly_status.messages_received += 1
-                            
-                            if isinstance(data, list):
-                                for item in data:
-                                    await self._process_poly_message(item)
-                                    await self._notify_price("polymarket", item)
-                            else:
-                                await self._process_poly_message(data)
-                                await self._notify_price("polymarket", data)
-                            
-                        except Exception as e:
-                            pass
+                        # Forward raw message, parsing happens in _poly_parser
+                        await self._notify_raw("polymarket", message)
+                        self._enqueue(self._poly_queue, message)
                             
             except asyncio.CancelledError:
                 break
@@ -281,20 +345,19 @@ class LiveEngine:
         
         if msg_type == "price_change" or msg_type == "orderbook_change":
             asset_id = data.get("asset_id") or data.get("token_id")
-            if not asset_id:
+            if not asset_id or not isinstance(asset_id, str):
                 return
                 
             price = 0.0
             volume = 0
             
             if msg_type == "price_change":
-                price = float(data.get("price", 0))
-                volume = int(data.get("size", 0) or data.get("volume", 0))
+                price = _to_float(data.get("price"))
+                volume = int(_to_float(data.get("size") or data.get("volume")))
             elif msg_type == "orderbook_change":
-                bids = data.get("bids", [])
-                asks = data.get("asks", [])
-                if bids and len(bids) > 0:
-                    price = float(bids[0].get("price", 0))
+                bids = data.get("bids")
+                if bids and isinstance(bids, list) and isinstance(bids[0], dict):
+                    price = _to_float(bids[0].get("price"))
                     
             question = await self._get_poly_question(asset_id)
             await self.store.update_from_poly(asset_id, question or f"Market {asset_id}", price, volume)
@@ -303,6 +366,10 @@ class LiveEngine:
             self.poly_status.last_heartbeat = time.time()
             
     async def _get_poly_question(self, token_id: str) -> Optional[str]:
+        question = self._poly_questions.get(token_id)
+        if question is not None:
+            return question
+            
         if not self._http_client:
             return None
             
@@ -312,9 +379,12 @@ class LiveEngine:
                 params={"token_id": token_id, "active": "true"}
             )
             if response.status_code == 200:
-                markets = response.json()
+                markets = orjson.loads(response.content)
                 if markets and len(markets) > 0:
-                    return markets[0].get("question")
+                    question = markets[0].get("question")
+                    if question:
+                        self._poly_questions[token_id] = question
+                    return question
         except Exception:
             pass
             
@@ -1,9 +1,11 @@
 import re
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
+import orjson
 from rapidfuzz import fuzz, process
 
-STOP_WORDS = {
+STOP_WORDS = frozenset({
     'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
     'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
     'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
@@ -14,9 +16,30 @@ STOP_WORDS = {
     'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only',
     'own', 'same', 'so', 'than', 'too', 'very', 'just', 'if', 'then', 'else',
     'will', 'event', 'happen', 'will', 'occur'
-}
+})
 
-@dataclass
+_WORD_RE = re.compile(r'\w+')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
+
+@lru_cache(maxsize=4096)
+def _normalize(title: str, stop_words: frozenset) -> str:
+    # One scan: word runs are exactly what survives punctuation
+    # stripping followed by a whitespace split
+    words = _WORD_RE.findall(title.lower())
+    return ' '.join([w for w in words if w not in stop_words])
+
+@lru_cache(maxsize=2048)
+def _parse_prices(raw: str) -> tuple:
+    # Gamma sends outcomePrices as a JSON-encoded string that rarely
+    # changes between refreshes, so decode each distinct string once
+    try:
+        prices = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return ()
+    return tuple(prices) if isinstance(prices, list) else ()
+
+@dataclass(slots=True)
 class UnifiedMarket:
     id: str
     event_name: str
@@ -30,6 +53,11 @@ class UnifiedMarket:
     poly_volume: int = 0
     price_history: List[Dict[str, Any]] = field(default_factory=list)
     last_update: float = 0.0
+    # Table label, sliced once since event_name is fixed after creation
+    display_name: str = field(default="", init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.display_name = self.event_name[:35]
     
     @property
     def delta_percent(self) -> float:
@@ -56,18 +84,22 @@ class MarketMatcher:
     def normalize_title(self, title: str) -> str:
         if not title:
             return ""
-        title = title.lower()
-        title = re.sub(r'[^\w\s]', ' ', title)
-        words = title.split()
-        filtered = [w for w in words if w not in self.stop_words]
-        normalized = ' '.join(filtered)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        return normalized
+        # Titles barely change between refreshes, so results are cached
+        return _normalize(title, self.stop_words)
     
     def create_market_id(self, normalized_name: str) -> str:
-        clean = re.sub(r'[^a-z0-9]', '', normalized_name)
+        clean = _NON_ALNUM_RE.sub('', normalized_name)
         return clean[:50]
     
+    def normalize_with_id(self, title: str) -> Tuple[str, str]:
+        """normalize_title + create_market_id in a single call."""
+        norm = self.normalize_title(title)
+        # Normalized names are lowercase word runs joined by spaces, so
+        # plain-ASCII names without underscores only need spaces removed
+        if norm.isascii() and '_' not in norm:
+            return norm, norm.replace(' ', '')[:50]
+        return norm, self.create_market_id(norm)
+    
     def match_markets(
         self, 
         kalshi_markets: List[Any], 
@@ -78,20 +110,26 @@ class MarketMatcher:
         kalshi_normalized = {}
         for km in kalshi_markets:
             title = getattr(km, 'title', '') or getattr(km, 'ticker', '')
-            norm = self.normalize_title(title)
-            uid = self.create_market_id(norm)
+            norm, uid = self.normalize_with_id(title)
+            
+            # SDK models may carry Decimal or string prices; the store and
+            # UI work in plain floats
+            try:
+                price = float(getattr(km, 'yes_bid', 0) or getattr(km, 'last_price', 0) or 0)
+            except (ValueError, TypeError):
+                price = 0.0
+                
             kalshi_normalized[uid] = {
                 'market': km,
                 'normalized': norm,
                 'ticker': getattr(km, 'ticker', ''),
-                'price': getattr(km, 'yes_bid', 0) or getattr(km, 'last_price', 0),
+                'price': price,
                 'volume': getattr(km, 'volume', 0)
             }
         
         for pm in poly_markets:
             question = pm.get('question', '')
-            norm = self.normalize_title(question)
-            uid = self.create_market_id(norm)
+            norm, uid = self.normalize_with_id(question)
             
             token_id = None
             price = 0.0
@@ -101,6 +139,8 @@ class MarketMatcher:
                 token_id = pm['tokens'][0].get('token_id')
             
             outcome_prices = pm.get('outcomePrices', [])
+            if isinstance(outcome_prices, str):
+                outcome_prices = _parse_prices(outcome_prices)
             if outcome_prices and len(outcome_prices) > 0:
                 try:
                     price = float(outcome_prices[0])
@@ -143,46 +183,6 @@ class MarketMatcher:
                     kalshi_volume=km_data['volume']
                 )
         
-        unmatched_poly = []
-        for pm in poly_markets:
-            question = pm.get('question', '')
-            norm = self.normalize_title(question)
-            uid = self.create_market_id(norm)
-            
-            if uid not in kalshi_normalized:
-                unmatched_poly.append((norm, uid, pm))
-        
-        for norm, uid, pm in unmatched_poly:
-            if uid not in unified_markets:
-                token_id = None
-                price = 0.0
-                volume = 0
-                
-                if pm.get('tokens') and len(pm['tokens']) > 0:
-                    token_id = pm['tokens'][0].get('token_id')
-                
-                outcome_prices = pm.get('outcomePrices', [])
-                if outcome_prices and len(outcome_prices) > 0:
-                    try:
-                        price = float(outcome_prices[0])
-                    except (ValueError, TypeError):
-                        price = 0.0
-                
-                try:
-                    volume = int(pm.get('volume', 0) or 0)
-                except (ValueError, TypeError):
-                    volume = 0
-                
-                unified_markets[uid] = UnifiedMarket(
-                    id=uid,
-                    event_name=question,
-                    normalized_name=norm,
-                    poly_token_id=token_id,
-                    poly_question=question,
-                    poly_price=price,
-                    poly_volume=volume
-                )
-        
         return unified_markets
     
     def fuzzy_match_single(
@@ -203,11 +203,25 @@ class MarketMatcher:
         result = process.extractOne(
             norm_query, 
             choices,
-            scorer=fuzz.token_set_ratio
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=self.threshold
         )
         
-        if result and result[1] >= self.threshold:
-            idx = choices.index(result[0])
-            return market_list[idx]
+        if result:
+            return market_list[result[2]]
         
         return None
+    
+    def fuzzy_match_all(self, norm_query: str, choices: List[str]) -> List[int]:
+        """Indices of already-normalized choices scoring at or above the threshold."""
+        if not choices:
+            return []
+            
+        results = process.extract(
+            norm_query,
+            choices,
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=self.threshold,
+            limit=None
+        )
+        return [idx for _, _, idx in results]
@@ -1,13 +1,15 @@
 import asyncio
 import time
-from typing import Dict, List, Callable, Optional, Any
+from typing import Dict, List, Callable, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 
+import numpy as np
+
 from market_matcher import UnifiedMarket, MarketMatcher
 
 
-@dataclass
+@dataclass(slots=True)
 class PricePoint:
     timestamp: float
     kalshi_price: Optional[float] = None
@@ -16,14 +18,181 @@ class PricePoint:
     poly_volume: int = 0
 
 
+class PriceHistory:
+    """
+    Price history for one market as parallel NumPy columns (SoA).
+    Points sit in timestamp order in [start, size); the buffer holds twice
+    the capacity so dropping old points is an occasional block move.
+    Missing prices are NaN.
+    """
+    __slots__ = (
+        'capacity', 'start', 'size', 'timestamps',
+        'kalshi_prices', 'poly_prices', 'kalshi_volumes', 'poly_volumes'
+    )
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+        self.timestamps = np.zeros(capacity * 2, dtype=np.float64)
+        self.kalshi_prices = np.full(capacity * 2, np.nan, dtype=np.float64)
+        self.poly_prices = np.full(capacity * 2, np.nan, dtype=np.float64)
+        self.kalshi_volumes = np.zeros(capacity * 2, dtype=np.int64)
+        self.poly_volumes = np.zeros(capacity * 2, dtype=np.int64)
+        
+    def __len__(self) -> int:
+        return self.size - self.start
+        
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return (
+            self.timestamps, self.kalshi_prices, self.poly_prices,
+            self.kalshi_volumes, self.poly_volumes
+        )
+        
+    def _load(self, columns: Tuple[np.ndarray, ...]):
+        """Replace contents with sorted columns, keeping the newest points."""
+        n = min(len(columns[0]), self.capacity)
+        for dst, src in zip(self._columns(), columns):
+            dst[:n] = src[len(src) - n:]
+        self.start = 0
+        self.size = n
+        
+    @property
+    def last_timestamp(self) -> float:
+        return self.timestamps[self.size - 1]
+        
+    def append(
+        self,
+        timestamp: float,
+        kalshi_price: Optional[float],
+        poly_price: Optional[float],
+        kalshi_volume: int,
+        poly_volume: int
+    ):
+        if self.size == len(self.timestamps):
+            self._load(tuple(c[self.start:self.size] for c in self._columns()))
+        i = self.size
+        self.timestamps[i] = timestamp
+        self.kalshi_prices[i] = np.nan if kalshi_price is None else kalshi_price
+        self.poly_prices[i] = np.nan if poly_price is None else poly_price
+        self.kalshi_volumes[i] = kalshi_volume
+        self.poly_volumes[i] = poly_volume
+        self.size += 1
+        if self.size - self.start > self.capacity:
+            self.start += 1
+            
+    def update_last(
+        self,
+        kalshi_price: Optional[float],
+        poly_price: Optional[float],
+        kalshi_volume: int,
+        poly_volume: int
+    ):
+        i = self.size - 1
+        if kalshi_price is not None:
+            self.kalshi_prices[i] = kalshi_price
+            self.kalshi_volumes[i] = kalshi_volume
+        if poly_price is not None:
+            self.poly_prices[i] = poly_price
+            self.poly_volumes[i] = poly_volume
+            
+    def merge(self, points: List[Tuple[float, float]], platform: str):
+        """
+        Fold (timestamp, price) pairs into one platform's column. A point
+        within 60s of an existing one overwrites its price; the rest are
+        inserted and the window re-sorted.
+        """
+        column = self.kalshi_prices if platform == 'kalshi' else self.poly_prices
+        existing_ts = self.timestamps[self.start:self.size]
+        n = len(existing_ts)
+        added_ts: List[float] = []
+        added_px: List[float] = []
+        
+        # Timestamps are sorted, so the first point within a minute of ts
+        # is the first one after ts - 60, provided it is before ts + 60
+        incoming = np.fromiter((ts for ts, _ in points), dtype=np.float64, count=len(points))
+        first_near = np.searchsorted(existing_ts, incoming - 60, side='right').tolist()
+        
+        for (ts, price), i in zip(points, first_near):
+            if i < n and existing_ts[i] - ts < 60:
+                column[self.start + i] = price
+                continue
+            for j, added in enumerate(added_ts):
+                if abs(added - ts) < 60:
+                    added_px[j] = price
+                    break
+            else:
+                added_ts.append(ts)
+                added_px.append(price)
+                
+        if not added_ts:
+            return
+            
+        k = len(added_ts)
+        nan = np.full(k, np.nan, dtype=np.float64)
+        px = np.asarray(added_px, dtype=np.float64)
+        extra = (
+            np.asarray(added_ts, dtype=np.float64),
+            px if platform == 'kalshi' else nan,
+            nan if platform == 'kalshi' else px,
+            np.zeros(k, dtype=np.int64),
+            np.zeros(k, dtype=np.int64)
+        )
+        merged = tuple(
+            np.concatenate((c[self.start:self.size], e))
+            for c, e in zip(self._columns(), extra)
+        )
+        order = np.argsort(merged[0], kind='stable')
+        self._load(tuple(c[order] for c in merged))
+        
+    def points(self, limit: Optional[int] = None) -> List[PricePoint]:
+        first = self.start if limit is None else max(self.start, self.size - limit)
+        window = slice(first, self.size)
+        return [
+            PricePoint(
+                timestamp=ts,
+                kalshi_price=None if kp != kp else kp,
+                poly_price=None if pp != pp else pp,
+                kalshi_volume=kv,
+                poly_volume=pv
+            )
+            for ts, kp, pp, kv, pv in zip(
+                self.timestamps[window].tolist(),
+                self.kalshi_prices[window].tolist(),
+                self.poly_prices[window].tolist(),
+                self.kalshi_volumes[window].tolist(),
+                self.poly_volumes[window].tolist()
+            )
+        ]
+
+
 class UnifiedStore:
     def __init__(self):
         self.markets: Dict[str, UnifiedMarket] = {}
         self.matcher = MarketMatcher()
         self._subscribers: List[Callable] = []
+        # market_id -> (market, change_type) awaiting delivery; a burst of
+        # ticks for one market collapses into a single notification
+        self._pending_notifications: Dict[str, Tuple[UnifiedMarket, str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # The store is only touched from the event loop, so tick updates
+        # need no lock; this just serialises overlapping rebuilds
         self._lock = asyncio.Lock()
-        self._price_history: Dict[str, List[PricePoint]] = defaultdict(list)
         self.max_history_size = 100
+        self._price_history: Dict[str, PriceHistory] = defaultdict(
+            lambda: PriceHistory(self.max_history_size)
+        )
+        self._last_feed_fingerprint: Optional[int] = None
+        self._kalshi_ticker_index: Dict[str, str] = {}
+        # (markets, normalized names) for search; dropped when a market is added
+        self._search_corpus: Optional[Tuple[List[UnifiedMarket], List[str]]] = None
+        # token_id -> (question, normalized name, market id)
+        self._poly_id_cache: Dict[str, tuple] = {}
+        # Price columns (SoA) indexed by a per-market slot for vectorized scans
+        self._slot_index: Dict[str, int] = {}
+        self._slot_ids: List[str] = []
+        self._kalshi_prices = np.zeros(64, dtype=np.float64)
+        self._poly_prices = np.zeros(64, dtype=np.float64)
         
     def subscribe(self, callback: Callable):
         self._subscribers.append(callback)
@@ -32,7 +201,24 @@ class UnifiedStore:
         if callback in self._subscribers:
             self._subscribers.remove(callback)
             
-    async def _notify_subscribers(self, market: UnifiedMarket, change_type: str):
+    def _notify_subscribers(self, market: UnifiedMarket, change_type: str):
+        pending = self._pending_notifications.get(market.id)
+        if pending is not None and pending[1] == 'new_market':
+            change_type = 'new_market'
+        self._pending_notifications[market.id] = (market, change_type)
+        
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_notifications())
+            
+    async def _flush_notifications(self):
+        pending = self._pending_notifications
+        self._pending_notifications = {}
+        self._flush_task = None
+        
+        for market, change_type in pending.values():
+            await self._dispatch(market, change_type)
+            
+    async def _dispatch(self, market: Optional[UnifiedMarket], change_type: str):
         for callback in self._subscribers:
             try:
                 if asyncio.iscoroutinefunction(callback):
@@ -43,59 +229,71 @@ class UnifiedStore:
                 pass
                 
     async def update_from_kalshi(self, ticker: str, price: float, volume: int):
-        async with self._lock:
-            for market in self.markets.values():
-                if market.kalshi_ticker == ticker:
-                    market.kalshi_price = price
-                    market.kalshi_volume = volume
-                    market.last_update = time.time()
-                    self._add_price_point(market.id, kalshi_price=price, kalshi_volume=volume)
-                    await self._notify_subscribers(market, 'kalshi_update')
-                    return
-                    
+        now = time.time()
+        market = self._find_kalshi_market(ticker)
+        if market is not None:
+            market.kalshi_price = price
+            market.kalshi_volume = volume
+            market.last_update = now
+            self._sync_prices(market)
+            self._add_price_point(market.id, now, kalshi_price=price, kalshi_volume=volume)
+            self._notify_subscribers(market, 'kalshi_update')
+            return
+                
+        new_market = UnifiedMarket(
+            id=f"kalshi_{ticker.lower()}",
+            event_name=ticker,
+            normalized_name=self.matcher.normalize_title(ticker),
+            kalshi_ticker=ticker,
+            kalshi_price=price,
+            kalshi_volume=volume
+        )
+        self.markets[new_market.id] = new_market
+        self._search_corpus = None
+        self._kalshi_ticker_index[ticker] = new_market.id
+        self._sync_prices(new_market)
+        self._add_price_point(new_market.id, now, kalshi_price=price, kalshi_volume=volume)
+        self._notify_subscribers(new_market, 'new_market')
+        
+    async def update_from_poly(self, token_id: str, question: str, price: float, volume: int):
+        now = time.time()
+        cached = self._poly_id_cache.get(token_id)
+        if cached is not None and cached[0] == question:
+            _, norm_name, market_id = cached
+        else:
+            norm_name, market_id = self.matcher.normalize_with_id(question)
+            self._poly_id_cache[token_id] = (question, norm_name, market_id)
+        
+        if market_id in self.markets:
+            market = self.markets[market_id]
+            market.poly_token_id = token_id
+            market.poly_question = question
+            market.poly_price = price
+            market.poly_volume = volume
+            market.last_update = now
+            self._sync_prices(market)
+            self._add_price_point(market_id, now, poly_price=price, poly_volume=volume)
+            self._notify_subscribers(market, 'poly_update')
+        else:
             new_market = UnifiedMarket(
-                id=f"kalshi_{ticker.lower()}",
-                event_name=ticker,
-                normalized_name=self.matcher.normalize_title(ticker),
-                kalshi_ticker=ticker,
-                kalshi_price=price,
-                kalshi_volume=volume
+                id=market_id,
+                event_name=question,
+                normalized_name=norm_name,
+                poly_token_id=token_id,
+                poly_question=question,
+                poly_price=price,
+                poly_volume=volume
             )
             self.markets[new_market.id] = new_market
-            self._add_price_point(new_market.id, kalshi_price=price, kalshi_volume=volume)
-            await self._notify_subscribers(new_market, 'new_market')
+            self._search_corpus = None
+            self._sync_prices(new_market)
+            self._add_price_point(new_market.id, now, poly_price=price, poly_volume=volume)
+            self._notify_subscribers(new_market, 'new_market')
             
-    async def update_from_poly(self, token_id: str, question: str, price: float, volume: int):
-        async with self._lock:
-            norm_name = self.matcher.normalize_title(question)
-            market_id = self.matcher.create_market_id(norm_name)
-            
-            if market_id in self.markets:
-                market = self.markets[market_id]
-                market.poly_token_id = token_id
-                market.poly_question = question
-                market.poly_price = price
-                market.poly_volume = volume
-                market.last_update = time.time()
-                self._add_price_point(market_id, poly_price=price, poly_volume=volume)
-                await self._notify_subscribers(market, 'poly_update')
-            else:
-                new_market = UnifiedMarket(
-                    id=market_id,
-                    event_name=question,
-                    normalized_name=norm_name,
-                    poly_token_id=token_id,
-                    poly_question=question,
-                    poly_price=price,
-                    poly_volume=volume
-                )
-                self.markets[new_market.id] = new_market
-                self._add_price_point(new_market.id, poly_price=price, poly_volume=volume)
-                await self._notify_subscribers(new_market, 'new_market')
-                
     def _add_price_point(
         self, 
         market_id: str, 
+        now: float,
         kalshi_price: Optional[float] = None,
         poly_price: Optional[float] = None,
         kalshi_volume: int = 0,
@@ -105,27 +303,38 @@ class UnifiedStore:
         if not market:
             return
             
-        last_point = self._price_history[market_id][-1] if self._price_history[market_id] else None
-        
-        if last_point and (time.time() - last_point.timestamp) < 1:
-            if kalshi_price is not None:
-                last_point.kalshi_price = kalshi_price
-                last_point.kalshi_volume = kalshi_volume
-            if poly_price is not None:
-                last_point.poly_price = poly_price
-                last_point.poly_volume = poly_volume
+        history = self._price_history[market_id]
+        
+        if len(history) and (now - history.last_timestamp) < 1:
+            history.update_last(kalshi_price, poly_price, kalshi_volume, poly_volume)
         else:
-            point = PricePoint(
-                timestamp=time.time(),
-                kalshi_price=kalshi_price,
-                poly_price=poly_price,
-                kalshi_volume=kalshi_volume,
-                poly_volume=poly_volume
-            )
-            self._price_history[market_id].append(point)
+            history.append(now, kalshi_price, poly_price, kalshi_volume, poly_volume)
+                
+    def _find_kalshi_market(self, ticker: str) -> Optional[UnifiedMarket]:
+        market = self.markets.get(self._kalshi_ticker_index.get(ticker, ''))
+        if market is not None and market.kalshi_ticker == ticker:
+            return market
             
-            if len(self._price_history[market_id]) > self.max_history_size:
-                self._price_history[market_id] = self._price_history[market_id][-self.max_history_size:]
+        # Unknown or stale ticker: scan once and repair the index
+        for market in self.markets.values():
+            if market.kalshi_ticker == ticker:
+                self._kalshi_ticker_index[ticker] = market.id
+                return market
+        return None
+        
+    def _sync_prices(self, market: UnifiedMarket):
+        slot = self._slot_index.get(market.id)
+        if slot is None:
+            slot = len(self._slot_ids)
+            if slot == len(self._kalshi_prices):
+                grow = np.zeros(slot, dtype=np.float64)
+                self._kalshi_prices = np.concatenate((self._kalshi_prices, grow))
+                self._poly_prices = np.concatenate((self._poly_prices, grow))
+            self._slot_index[market.id] = slot
+            self._slot_ids.append(market.id)
+            
+        self._kalshi_prices[slot] = market.kalshi_price
+        self._poly_prices[slot] = market.poly_price
                 
     def get_market(self, market_id: str) -> Optional[UnifiedMarket]:
         return self.markets.get(market_id)
@@ -133,60 +342,66 @@ class UnifiedStore:
     def get_all_markets(self) -> List[UnifiedMarket]:
         return list(self.markets.values())
         
+    def _delta_column(self):
+        """Vectorized delta_percent per slot; 0 where a price is missing."""
+        n = len(self._slot_ids)
+        kalshi = self._kalshi_prices[:n]
+        poly = self._poly_prices[:n]
+        
+        both = (kalshi > 0) & (poly > 0)
+        delta = np.zeros(n, dtype=np.float64)
+        np.divide((poly - kalshi) * 100, kalshi, out=delta, where=both)
+        return both, delta
+        
     def get_markets_with_spread(self, min_spread: float = 3.0) -> List[UnifiedMarket]:
-        return [
-            m for m in self.markets.values() 
-            if m.has_both_prices and abs(m.delta_percent) >= min_spread
-        ]
+        both, delta = self._delta_column()
+        hits = np.flatnonzero(both & (np.abs(delta) >= min_spread))
+        return [self.markets[self._slot_ids[i]] for i in hits]
+        
+    def get_markets_by_spread(self, min_spread: float = 0.0, limit: int = 10) -> List[UnifiedMarket]:
+        """Markets with |delta| >= min_spread, widest spread first."""
+        _, delta = self._delta_column()
+        spread = np.abs(delta)
+        hits = np.flatnonzero(spread >= min_spread)
+        order = hits[np.argsort(-spread[hits], kind="stable")][:limit]
+        return [self.markets[self._slot_ids[i]] for i in order]
         
-    def get_price_history(self, market_id: str) -> List[PricePoint]:
-        return self._price_history.get(market_id, [])
+    def get_price_history(self, market_id: str, limit: Optional[int] = None) -> List[PricePoint]:
+        """Oldest-first price points, optionally only the newest `limit`."""
+        history = self._price_history.get(market_id)
+        return history.points(limit) if history is not None else []
 
     async def add_history_points(self, market_id: str, points: List[Dict[str, Any]], platform: str):
         """
         Batch add historical price points.
         points should have 'price' and 'timestamp'
         """
-        async with self._lock:
-            for p in points:
-                ts = p.get('timestamp')
-                price = p.get('price')
-                
-                if ts is None or price is None:
-                    continue
-                
-                # Check if we already have a point close to this timestamp
-                found = False
-                for existing in self._price_history[market_id]:
-                    if abs(existing.timestamp - ts) < 60: # Within 1 minute
-                        if platform == 'kalshi':
-                            existing.kalshi_price = price
-                        else:
-                            existing.poly_price = price
-                        found = True
-                        break
-                
-                if not found:
-                    new_p = PricePoint(timestamp=ts)
-                    if platform == 'kalshi':
-                        new_p.kalshi_price = price
-                    else:
-                        new_p.poly_price = price
-                    self._price_history[market_id].append(new_p)
-            
-            # Sort and trim
-            self._price_history[market_id].sort(key=lambda x: x.timestamp)
-            if len(self._price_history[market_id]) > self.max_history_size:
-                self._price_history[market_id] = self._price_history[market_id][-self.max_history_size:]
-        
+        valid = [
+            (p['timestamp'], p['price']) for p in points
+            if p.get('timestamp') is not None and p.get('price') is not None
+        ]
+        if valid:
+            self._price_history[market_id].merge(valid, platform)
+    
     async def rebuild_from_feeds(
         self, 
         kalshi_markets: List[Any], 
         poly_markets: List[Any]
     ):
         async with self._lock:
-            unified = self.matcher.match_markets(kalshi_markets, poly_markets)
+            # Fingerprinting and matching are pure CPU work over the whole
+            # feed; run both on a worker thread so the UI and websocket
+            # tasks keep running during a rebuild
+            result = await asyncio.to_thread(
+                self._match_feeds, kalshi_markets, poly_markets
+            )
+            if result is None:
+                return
+            self._last_feed_fingerprint, unified = result
             
+            # No awaits until the merge is done, so tick updates never
+            # observe a half-applied rebuild
+            now = time.time()
             for market_id, new_market in unified.items():
                 if market_id in self.markets:
                     existing = self.markets[market_id]
@@ -197,31 +412,63 @@ class UnifiedStore:
                     existing.poly_volume = new_market.poly_volume
                     existing.poly_token_id = new_market.poly_token_id
                     existing.poly_question = new_market.poly_question
-                    existing.last_update = time.time()
+                    existing.last_update = now
+                    self._sync_prices(existing)
                 else:
                     self.markets[market_id] = new_market
+                    self._search_corpus = None
+                    self._sync_prices(new_market)
+                    
+                if new_market.kalshi_ticker:
+                    self._kalshi_ticker_index[new_market.kalshi_ticker] = market_id
                     
-            for callback in self._subscribers:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(None, 'rebuild_complete')
-                    else:
-                        callback(None, 'rebuild_complete')
-                except Exception as e:
-                    pass
+            await self._dispatch(None, 'rebuild_complete')
+                    
+    def _match_feeds(
+        self, 
+        kalshi_markets: List[Any], 
+        poly_markets: List[Any]
+    ) -> Optional[Tuple[int, Dict[str, UnifiedMarket]]]:
+        """(fingerprint, matched markets), or None if the feeds are unchanged."""
+        fingerprint = self._feed_fingerprint(kalshi_markets, poly_markets)
+        if fingerprint == self._last_feed_fingerprint:
+            return None
+        return fingerprint, self.matcher.match_markets(kalshi_markets, poly_markets)
+        
+    def _feed_fingerprint(self, kalshi_markets: List[Any], poly_markets: List[Any]) -> int:
+        """Cheap content hash of the feed fields that end up in the store."""
+        return hash((
+            tuple(
+                (
+                    getattr(km, 'ticker', ''),
+                    getattr(km, 'title', ''),
+                    getattr(km, 'yes_bid', 0),
+                    getattr(km, 'last_price', 0),
+                    getattr(km, 'volume', 0)
+                )
+                for km in kalshi_markets
+            ),
+            tuple(
+                (
+                    pm.get('id'),
+                    pm.get('question', ''),
+                    str(pm.get('outcomePrices', '')),
+                    str(pm.get('volume', ''))
+                )
+                for pm in poly_markets
+            )
+        ))
                     
     def search_markets(self, query: str) -> List[UnifiedMarket]:
         norm_query = self.matcher.normalize_title(query)
-        results = []
+        if self._search_corpus is None:
+            markets = list(self.markets.values())
+            self._search_corpus = (markets, [m.normalized_name for m in markets])
+        markets, names = self._search_corpus
         
-        for market in self.markets.values():
-            if norm_query in market.normalized_name:
-                results.append(market)
-            elif self.matcher.fuzzy_match_single(
-                query, 
-                [{'event_name': m.event_name, 'id': m.id} for m in [market]],
-                key='event_name'
-            ):
-                results.append(market)
-                
-        return results
+        # Score every candidate against the query in one rapidfuzz call,
+        # using the names normalized when the markets were created
+        hits = set(self.matcher.fuzzy_match_all(norm_query, names))
+        hits.update(i for i, name in enumerate(names) if norm_query in name)
+        
+        return [markets[i] for i in sorted(hits)]
@@ -1,16 +1,20 @@
 import os
+import sys
 import asyncio
-import json
 import logging
-from datetime import datetime
-from decimal import Decimal
-from typing import Optional, List, Dict
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Optional, List, Dict, Tuple, Deque, Set, Callable, Any
 
+import orjson
 from dotenv import load_dotenv
+from rich.markup import escape
+from sortedcontainers import SortedList
 load_dotenv()
 
 from textual.app import App, ComposeResult
-from textual.containers import Container, Horizontal, Vertical, Grid
+from textual.containers import Container, Vertical, Grid
 from textual.widgets import (
     Header, Footer, Static, Input, 
     RichLog, Label, DataTable, Sparkline
@@ -22,34 +26,121 @@ from textual import work
 from kalshi_client import KalshiClient
 from live_engine import LiveEngine
 from unified_store import UnifiedStore
+from market_matcher import UnifiedMarket
 from agent_manager import AgentManager
 
 # Configure logging to hide noise
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger("UnifiedTerminal")
 
+_DELTA_COLORS = ("red", "green") # indexed by delta > 0
+
+# Agent output style -> markup color
+_STYLE_COLOR = {
+    "default": "white",
+    "success": "green",
+    "warning": "yellow",
+    "error": "red",
+    "user": "cyan",
+    "assistant": "bright_blue",
+}
+
+# Log line prefix per feed, as named by LiveEngine's raw callbacks
+_PLATFORM_PREFIX = {
+    "kalshi": "[cyan]KALSHI[/]",
+    "polymarket": "[magenta]POLYMARKET[/]",
+}
+
+# Heartbeat envelopes, matched on the raw frame so they are never parsed
+_HEARTBEAT_MARKERS = ('"type":"heartbeat"', '"type": "heartbeat"')
+_HEARTBEAT_MARKERS_B = tuple(m.encode() for m in _HEARTBEAT_MARKERS)
+
+_SMALL_VOLUMES = [str(i) for i in range(1_000)]
+# "0K".."1000K": round() and the :.0f format both round half-to-even on
+# the same float, so the table index reproduces f"{vol/1_000:.0f}K"
+_THOUSAND_VOLUMES = [f"{i}K" for i in range(1_001)]
+
+@lru_cache(maxsize=8192)
+def _format_volume(vol: int) -> str:
+    if vol >= 1_000_000: return f"{vol/1_000_000:.1f}M"
+    if vol >= 1_000: return f"{vol/1_000:.0f}K"
+    return str(vol)
+
+def format_volume(vol: int) -> str:
+    if isinstance(vol, int):
+        if 0 <= vol < 1_000:
+            return _SMALL_VOLUMES[vol]
+        if 1_000 <= vol < 1_000_000:
+            return _THOUSAND_VOLUMES[round(vol / 1_000)]
+    return _format_volume(vol)
+
+@lru_cache(maxsize=4096)
+def _delta_cell(positive: bool, d_text: str) -> str:
+    # Keyed on the delta text the cell shows, so the same spread across
+    # refreshes is a dict hit; -0.0 and 0.0 hash equal, their text doesn't
+    return f"[{_DELTA_COLORS[positive]}]{d_text}%[/]"
+
+def build_row(m: UnifiedMarket) -> Tuple[str, str, str, str, str]:
+    """Format one market as (name, kalshi, poly, delta, volume) table cells."""
+    kalshi_price: float = m.kalshi_price
+    poly_price: float = m.poly_price
+    has_both = kalshi_price > 0 and poly_price > 0
+    
+    k_price = f"{kalshi_price:.2f}" if kalshi_price > 0 else "-"
+    p_price = f"{poly_price:.2f}" if poly_price > 0 else "-"
+    
+    delta = "-"
+    if has_both:
+        d_val = (poly_price - kalshi_price) / kalshi_price * 100
+        delta = _delta_cell(d_val > 0, f"{d_val:+.1f}")
+    
+    # Simple icon for status
+    status = "●" if has_both else "○"
+    
+    return (
+        f"{status} {m.display_name}",
+        k_price,
+        p_price,
+        delta,
+        format_volume(m.kalshi_volume + m.poly_volume)
+    )
+
 class BloombergTicker(Static):
     """Sleek top ticker for market indices/status."""
+    # Static segments only change when real index data is wired in
+    _PREFIX = (
+        " [bold cyan]LIVE STREAM[/] | KALSHI: [green]DEMO[/] | POLY: [green]ACTIVE[/] | "
+        "DXY: 104.20 (-0.05%) | BTC: 67,890 (+2.34%) | "
+    )
+
     def on_mount(self):
         self.set_interval(2, self.update_ticker)
         self.update_ticker()
 
     def update_ticker(self):
-        now = datetime.now().strftime("%H:%M:%S")
-        self.update(
-            f" [bold cyan]LIVE STREAM[/] | KALSHI: [green]DEMO[/] | POLY: [green]ACTIVE[/] | "
-            f"DXY: 104.20 (-0.05%) | BTC: 67,890 (+2.34%) | {now} "
-        )
+        # time.strftime formats the local clock without a datetime object
+        self.update(self._PREFIX + time.strftime("%H:%M:%S "))
+
+_STATUS_READY = "[Clawdbot v1.0] Ready and monitoring..."
 
 class ClawdbotStatus(Static):
     """Dynamic status bar for the AI agent."""
-    message = reactive("[Clawdbot v1.0] Ready and monitoring...")
+    message = reactive(_STATUS_READY)
+    _rendered = f" 🦞 {_STATUS_READY}"
+
+    def watch_message(self, message: str) -> None:
+        # Build the line once per message instead of on every repaint
+        self._rendered = f" 🦞 {message}"
 
     def render(self) -> str:
-        return f" 🦞 {self.message}"
+        return self._rendered
 
 class UnifiedTerminal(App):
     CSS_PATH = "unified_terminal.tcss"
+    REDRAW_INTERVAL = 0.15 # seconds between coalesced table redraws
+    LOG_FLUSH_INTERVAL = 0.1 # seconds between log flushes
+    LOG_MAX_LINES = 500 # lines kept per log, and pending lines per flush
+    MAX_TABLE_ROWS = 500 # highest-volume markets shown in the table
     
     BINDINGS = [
         Binding("q", "quit", "Quit"),
@@ -78,42 +169,74 @@ class UnifiedTerminal(App):
         )
         
         self.show_logs = True
-        self.market_map = {} # row_index -> market_id
+        # Commands handled in the UI without a round trip to the agent
+        self._local_commands: Dict[str, Callable[[], None]] = {
+            "/help": self._cmd_help,
+            "/clear": self.action_clear_logs,
+            "/toggle": self.action_toggle_logs,
+        }
+        self._row_order: List[str] = [] # market ids in table order
+        self._row_values: Dict[str, Tuple[str, ...]] = {} # market_id -> cells
+        # market_id -> (price/volume inputs, formatted cells)
+        self._row_fmt_cache: Dict[str, Tuple[tuple, Tuple[str, ...]]] = {}
+        self._stale_rows: Set[str] = set() # offscreen rows showing old cells
+        self._table_dirty = False
+        # Volume ranking kept current from store notifications as
+        # (-total_volume, first-seen seq, market_id); _ranked holds the
+        # (volume, seq) each market was last filed under
+        self._sorted_markets = SortedList()
+        self._ranked: Dict[str, Tuple[int, int]] = {}
+        # Log entries waiting for the next flush, formatted only then so
+        # entries pushed out of a full buffer never cost any formatting:
+        # websocket (prefix, msg_type, preview) and agent (text, style)
+        self._ws_log_buf: Deque[Tuple[str, str, Any]] = deque(maxlen=self.LOG_MAX_LINES)
+        self._agent_log_buf: Deque[Tuple[str, str]] = deque(maxlen=self.LOG_MAX_LINES)
 
     def compose(self) -> ComposeResult:
         yield BloombergTicker(id="ticker")
         
-        with Horizontal(id="main-area"):
+        # One grid for all three panes; the market pane spans both rows
+        with Grid(id="main-area"):
             with Vertical(id="market-pane"):
                 yield Label(" [bold underline]MARKET MONITOR[/]", classes="pane-title")
-                yield DataTable(id="market-table")
+                yield DataTable(id="market-table", zebra_stripes=False)
             
-            with Vertical(id="sidebar"):
-                with Vertical(id="websocket-pane"):
-                    yield Label(" [bold underline]WEBSOCKET FEEDS[/]", classes="pane-title")
-                    yield RichLog(id="ws-log", highlight=True, wrap=True, max_lines=500)
-                
-                with Vertical(id="agent-pane"):
-                    yield Label(" [bold underline]CLAWDBOT TERMINAL[/]", classes="pane-title")
-                    yield RichLog(id="agent-output", highlight=True, wrap=True)
-                    yield Input(placeholder="Ask Clawdbot... (e.g. /analyze)", id="agent-input")
+            with Vertical(id="websocket-pane"):
+                yield Label(" [bold underline]WEBSOCKET FEEDS[/]", classes="pane-title")
+                yield RichLog(id="ws-log", highlight=True, markup=True, wrap=True, max_lines=self.LOG_MAX_LINES)
+            
+            with Vertical(id="agent-pane"):
+                yield Label(" [bold underline]CLAWDBOT TERMINAL[/]", classes="pane-title")
+                yield RichLog(id="agent-output", highlight=True, markup=True, wrap=True, max_lines=self.LOG_MAX_LINES)
+                yield Input(placeholder="Ask Clawdbot... (e.g. /analyze)", id="agent-input")
         
         yield ClawdbotStatus(id="status-bar")
         yield Footer()
 
     async def on_mount(self) -> None:
-        table = self.query_one("#market-table", DataTable)
-        table.add_columns("Market", "Kalshi", "Poly", "Δ%", "Vol")
+        # Cache widget references used by actions and redraws
+        self._market_table = self.query_one("#market-table", DataTable)
+        self._main_area = self.query_one("#main-area", Grid)
+        self._agent_input = self.query_one("#agent-input", Input)
+        self._ws_log = self.query_one("#ws-log", RichLog)
+        self._agent_output = self.query_one("#agent-output", RichLog)
+        
+        table = self._market_table
+        self._column_keys = table.add_columns("Market", "Kalshi", "Poly", "Δ%", "Vol")
         table.cursor_type = "row"
+        self.watch(table, "scroll_y", self._on_table_scroll, init=False)
+        self._table_height = table.size.height
+        self.screen.screen_layout_refresh_signal.subscribe(self, self._on_layout_refresh)
         
-        # Connect to store updates
+        # Connect to store updates; redraws are coalesced on a timer
         self.store.subscribe(self._on_store_update)
+        self.set_interval(self.REDRAW_INTERVAL, self._maybe_redraw)
         
-        # Connect to raw websocket feeds
+        # Connect to raw websocket feeds and agent output; both logs are
+        # written in batches
         self.engine.add_raw_callback(self._on_raw_ws)
-        
-        # Connect agent output
         self.agent.add_output_callback(self._on_agent_output)
+        self.set_interval(self.LOG_FLUSH_INTERVAL, self._flush_logs)
         
         # Start background engines
         self.start_engines()
@@ -125,70 +248,179 @@ class UnifiedTerminal(App):
 
     def _on_store_update(self, market, change_type):
         if change_type == 'rebuild_complete' or change_type == 'new_market' or change_type in ['kalshi_update', 'poly_update']:
-            self.call_from_thread(self.update_market_table)
+            if market is None:
+                for m in self.store.get_all_markets():
+                    self._rank_market(m)
+            else:
+                self._rank_market(market)
+            self._table_dirty = True
+
+    def _rank_market(self, market: UnifiedMarket):
+        volume = market.total_volume
+        ranked = self._ranked.get(market.id)
+        if ranked is None:
+            seq = len(self._ranked)
+        else:
+            if ranked[0] == volume:
+                return
+            seq = ranked[1]
+            self._sorted_markets.remove((-ranked[0], seq, market.id))
+        self._sorted_markets.add((-volume, seq, market.id))
+        self._ranked[market.id] = (volume, seq)
+
+    def _maybe_redraw(self):
+        if not self._table_dirty:
+            return
+        self._table_dirty = False
+        self.update_market_table()
 
     def update_market_table(self):
-        table = self.query_one("#market-table", DataTable)
-        markets = self.store.get_all_markets()
-        markets.sort(key=lambda x: x.total_volume, reverse=True)
+        table = self._market_table
+        order = [
+            market_id for _, _, market_id
+            in self._sorted_markets.islice(0, self.MAX_TABLE_ROWS)
+        ]
+        markets = self.store.markets
+        row_values = self._row_values
+        stale_rows = self._stale_rows
+        previous = self._row_order
+        first, last = self._visible_rows()
         
-        # Efficient update: try to update existing rows or rebuild if needed
-        # For simplicity in this version, we clear and repopulate
-        # A more performant way would be to track row keys
-        table.clear()
-        self.market_map = {}
+        # Rows keep their place up to the first change in ranking; every
+        # row after it is re-appended in the new order
+        keep = 0
+        for old_id, new_id in zip(previous, order):
+            if old_id != new_id:
+                break
+            keep += 1
+        moved = previous[keep:]
         
-        for i, m in enumerate(markets):
-            k_price = f"{m.kalshi_price:.2f}" if m.kalshi_price > 0 else "-"
-            p_price = f"{m.poly_price:.2f}" if m.poly_price > 0 else "-"
-            
-            delta = "-"
-            if m.has_both_prices:
-                d_val = m.delta_percent
-                color = "green" if d_val > 0 else "red"
-                delta = f"[{color}]{d_val:+.1f}%[/]"
-            
-            vol = self.format_volume(m.total_volume)
-            
-            # Simple icon for status
-            status = "●" if m.has_both_prices else "○"
-            
-            table.add_row(
-                f"{status} {m.event_name[:35]}",
-                k_price,
-                p_price,
-                delta,
-                vol
-            )
-            self.market_map[i] = m.id
+        # Scroll callbacks fired by the edits below must not walk the old order
+        self._row_order = []
+        
+        # Hold screen updates so the whole refresh paints once
+        with self.batch_update():
+            if len(moved) > len(order) // 2:
+                # remove_row is O(rows), so large reshuffles rebuild instead
+                table.clear()
+                keep = 0
+                first, last = self._visible_rows()
+            else:
+                for market_id in moved:
+                    table.remove_row(market_id)
+                    
+            # Only rows on screen are formatted; offscreen rows are left
+            # as they are and refreshed when scrolled into view
+            for i in range(keep):
+                if first <= i < last:
+                    self._sync_row(order[i])
+                else:
+                    stale_rows.add(order[i])
+                    
+            for i in range(keep, len(order)):
+                market_id = order[i]
+                row = row_values.get(market_id)
+                if row is None or first <= i < last:
+                    row = self._row_cells(markets[market_id])
+                    stale_rows.discard(market_id)
+                else:
+                    stale_rows.add(market_id)
+                table.add_row(*row, key=market_id)
+                row_values[market_id] = row
+                
+        self._row_order = order
+        # Removals may have clamped the scroll offset mid-update
+        self._sync_visible_rows()
+
+    def _visible_rows(self) -> Tuple[int, int]:
+        table = self._market_table
+        first = int(table.scroll_y)
+        return first, first + table.size.height
+
+    def _row_cells(self, m: UnifiedMarket) -> Tuple[str, ...]:
+        # Most rows are unchanged between redraws; reuse their cells
+        inputs = (m.kalshi_price, m.poly_price, m.kalshi_volume + m.poly_volume)
+        cached = self._row_fmt_cache.get(m.id)
+        if cached is None or cached[0] != inputs:
+            cached = self._row_fmt_cache[m.id] = (inputs, build_row(m))
+        return cached[1]
+
+    def _sync_row(self, market_id: str):
+        """Bring one table row up to date, touching only changed cells."""
+        self._stale_rows.discard(market_id)
+        row = self._row_cells(self.store.markets[market_id])
+        old_row = self._row_values[market_id]
+        if old_row == row:
+            return
+        self._row_values[market_id] = row
+        for column_key, old, new in zip(self._column_keys, old_row, row):
+            if old != new:
+                self._market_table.update_cell(market_id, column_key, new)
+
+    def _on_table_scroll(self, old_y: float, new_y: float):
+        self._sync_visible_rows()
+
+    def _on_layout_refresh(self, screen):
+        # A resized table may bring stale rows into view; the layout signal
+        # fires once the table has its new size, unlike App.on_resize
+        height = self._market_table.size.height
+        if height != self._table_height:
+            self._table_height = height
+            self._sync_visible_rows()
+
+    def _sync_visible_rows(self):
+        if not self._stale_rows:
+            return
+        first, last = self._visible_rows()
+        with self.batch_update():
+            for market_id in self._row_order[first:last]:
+                if market_id in self._stale_rows:
+                    self._sync_row(market_id)
 
     def format_volume(self, vol) -> str:
-        if vol >= 1_000_000: return f"{vol/1_000_000:.1f}M"
-        if vol >= 1_000: return f"{vol/1_000:.0f}K"
-        return str(vol)
+        return format_volume(vol)
 
     def _on_raw_ws(self, platform, message):
+        markers = _HEARTBEAT_MARKERS if isinstance(message, str) else _HEARTBEAT_MARKERS_B
+        if markers[0] in message or markers[1] in message:
+            return # skip noise
+            
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
             msg_type = data.get('type', 'data')
             if msg_type == 'heartbeat': return # skip noise
             
-            color = "cyan" if platform == "kalshi" else "magenta"
-            formatted = f"[{color}]{platform.upper()}[/] | {msg_type} | {str(data)[:80]}..."
-            
-            self.call_from_thread(self.query_one("#ws-log").write, formatted)
+            prefix = _PLATFORM_PREFIX.get(platform)
+            if prefix is None:
+                prefix = f"[magenta]{escape(platform.upper())}[/]"
+            # Preview the raw frame; repr'ing the parsed dict would render
+            # the whole payload just to keep 80 characters of it
+            self._ws_log_buf.append((prefix, msg_type, message[:80]))
         except Exception:
             pass
 
     async def _on_agent_output(self, text, style="default"):
-        color = "white"
-        if style == "success": color = "green"
-        elif style == "warning": color = "yellow"
-        elif style == "error": color = "red"
-        elif style == "user": color = "cyan"
-        elif style == "assistant": color = "bright_blue"
-        
-        self.call_from_thread(self.query_one("#agent-output").write, f"[{color}]{text}[/]")
+        self._agent_log_buf.append((text, style))
+
+    def _flush_logs(self):
+        # Feed payloads and agent text are escaped so stray brackets
+        # render literally instead of being read as markup
+        if self._ws_log_buf:
+            lines = []
+            for prefix, msg_type, preview in self._ws_log_buf:
+                if not isinstance(preview, str):
+                    preview = preview.decode("utf-8", "replace")
+                lines.append(f"{prefix} | {escape(str(msg_type))} | {escape(preview)}...")
+            self._ws_log_buf.clear()
+            self._ws_log.write("\n".join(lines))
+            
+        if self._agent_log_buf:
+            lines = [
+                f"[{_STYLE_COLOR.get(style, 'white')}]{escape(text)}[/]"
+                for text, style in self._agent_log_buf
+            ]
+            self._agent_log_buf.clear()
+            self._agent_output.write("\n".join(lines))
 
     async def on_input_submitted(self, event: Input.Submitted):
         if event.input.id == "agent-input":
@@ -196,24 +428,39 @@ class UnifiedTerminal(App):
             event.input.value = ""
             if not cmd: return
             
-            # Use task to process without blocking UI
-            self.run_worker(self.agent.process_message(cmd))
+            local = self._local_commands.get(cmd.lower())
+            if local is not None:
+                local()
+                return
+            
+            # Use task to process without blocking UI; a new question
+            # supersedes one still in flight
+            self.run_worker(self.agent.process_message(cmd), exclusive=True)
+
+    def _cmd_help(self):
+        self._agent_log_buf.append((
+            "Local commands: /help, /clear (clear logs), "
+            "/toggle (show/hide websocket feeds). "
+            "Anything else is sent to Clawdbot.",
+            "default"
+        ))
 
     def action_toggle_logs(self):
         self.show_logs = not self.show_logs
-        sidebar = self.query_one("#websocket-pane")
-        sidebar.display = self.show_logs
+        self._main_area.set_class(not self.show_logs, "logs-hidden")
 
     def action_clear_logs(self):
-        self.query_one("#ws-log").clear()
-        self.query_one("#agent-output").clear()
+        self._ws_log_buf.clear()
+        self._agent_log_buf.clear()
+        self._ws_log.clear()
+        self._agent_output.clear()
 
     def action_refresh(self):
         # Trigger an engine poll or refresh if needed
         pass
 
     def action_focus_input(self):
-        self.query_one("#agent-input").focus()
+        self._agent_input.focus()
 
     async def on_unmount(self):
         await self.engine.stop()
@@ -221,6 +468,19 @@ class UnifiedTerminal(App):
         if hasattr(self.kalshi, 'close'):
             await self.kalshi.close()
 
+def _new_event_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """A uvloop loop where available, else None for Textual's default."""
+    if sys.platform == "win32":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    # Handed straight to App.run: uvloop.install() is deprecated from 3.12
+    loop = uvloop.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
 if __name__ == "__main__":
     app = UnifiedTerminal()
-    app.run()
+    app.run(loop=_new_event_loop())